@@ -0,0 +1,58 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled helpers for rsa_archer.record_search, used in place of their pure-Python versions when built."""
+
+
+cdef inline void _add(dict out, object value, object rid, Py_ssize_t limit):
+    cdef str key
+    cdef list bucket
+    if type(value) is str:
+        key = (<str>value).lower()
+    else:
+        key = str(value).lower()
+    bucket = <list>out.get(key)
+    if bucket is None:
+        out[key] = [rid]
+    elif len(bucket) < limit and rid not in bucket:
+        bucket.append(rid)
+
+
+def group_ids_by_value(items, str field_key, str id_key, dict grouped=None, Py_ssize_t limit=2):
+    """Group the record ids of flat search result items by lowercased field value, adding to grouped when given.
+    At most limit ids are kept per value.
+
+    Same behaviour as rsa_archer.record_search._group_ids_by_value_py, including returning None
+    for an item with a record id but no field value.
+    """
+    cdef dict out = {} if grouped is None else grouped
+    cdef dict obj
+    cdef object rid, raw, value
+    cdef bint found
+
+    for item in items:
+        if type(item) is dict:
+            obj = <dict>item
+            rid = obj.get(id_key)
+        else:
+            try:
+                rid = item[id_key]
+            except (KeyError, TypeError):
+                continue
+            obj = None
+        if not rid:
+            continue
+        if not isinstance(rid, int):
+            rid = int(rid)
+        raw = obj.get(field_key) if obj is not None else item.get(field_key)
+        if raw is None:
+            return None
+        if type(raw) is list:
+            found = False
+            for value in <list>raw:
+                if value is not None:
+                    _add(out, value, rid, limit)
+                    found = True
+            if not found:
+                return None
+        else:
+            _add(out, raw, rid, limit)
+    return out
@@ -31,6 +31,7 @@ class ArcherInstance:
 		self.header = ""
 		self.url = ""
 
+		self.current_app_name = None
 		self.application_level_id = ""
 		self.application_fields_json = {}
 		self.all_application_fields_array = []
@@ -178,6 +179,8 @@ class ArcherInstance:
 		:return: self, fills Archer_instance object with proper app_id and fields_ids
 		"""
 		api_url = f"{self.api_url_base}core/system/application/"
+		# only set again once the application fields actually loaded
+		self.current_app_name = None
 
 		try:
 			response = requests.get(api_url, headers=self.header, verify=False)
@@ -189,7 +192,8 @@ class ArcherInstance:
 			for application in data:
 				if application["RequestedObject"]["Name"] == app_name:
 					application_id = application["RequestedObject"]["Id"]
-					self.get_application_fields(application_id)
+					if self.get_application_fields(application_id):
+						self.current_app_name = app_name
 					break
 				all_folders.append(application["RequestedObject"]["Name"])
 
@@ -208,6 +212,7 @@ class ArcherInstance:
 				all_application_fields_array - array of active fields [id1, id2, id3]
 				application_fields_json - {{name:id}, {id: {"Type": f_type, "FieldId": id}}}
 				subforms_json_by_sf_name - {subform_name: {name:id}, {id: {"Type": f_type, "FieldId": id}},{"LevelId": level_id})
+				Returns True if the fields were loaded, False on error
 		"""
 
 		api_url = f"{self.api_url_base}core/system/fielddefinition/application/" + str(
@@ -238,9 +243,11 @@ class ArcherInstance:
 					self.subforms_json_by_sf_name[subform_name].update({"AllFields": all_fields})
 
 			self.application_level_id = str(level_id) # set the application ID, I found it here
+			return True
 
 		except Exception as e:
 			log.error("Function get_application_fields() didn't work, %s", e)
+			return False
 
 	def get_subform_fields_by_id(self, sub_form_id):
 		"""
@@ -294,6 +301,31 @@ class ArcherInstance:
 		except Exception as e:
 			log.error("Function get_value_id_by_field_name_and_value didn't work, %s", e)
 
+	def get_value_ids_by_field_name_and_values(self, field_name, values):
+		"""
+		:param field_name: values list field name, how you see it in app
+		:param values: list of values how you see them in app
+		:return: {value: [value_id]} for every value found in the values list, fetched with one call
+		"""
+		values_list_id = self.get_vl_id_by_field_name(field_name)
+		api_url = self.api_url_base + "core/system/valueslistvalue/flat/valueslist/" + str(values_list_id)
+		wanted = set(values)
+		value_ids = {}
+
+		try:
+			response = requests.get(api_url, headers=self.header, verify=False)
+			data = json.loads(response.content.decode("utf-8"))
+
+			for ind_value in data:
+				name = ind_value["RequestedObject"]["Name"]
+				if name in wanted and name not in value_ids:
+					value_ids[name] = [ind_value["RequestedObject"]["Id"]]
+
+		except Exception as e:
+			log.error("Function get_value_ids_by_field_name_and_values didn't work, %s", e)
+
+		return value_ids
+
 	def get_field_id_by_name(self, field_name, sub_form_name=None):
 		"""
 		:param sub_form_name: Add only if you need id of a subform of application, how you see it on the app
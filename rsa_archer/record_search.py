@@ -4,23 +4,210 @@ Record search helpers for rsa_archer.
 Provides RecordSearcher which implements:
 - get_record_id_by_field(app_name, field_display_name, field_value) -> int | None
 - get_record_ids_by_field_bulk(app_name, field_display_name, values) -> dict[str, int | None]
+- get_record_ids_by_field_bulk_async(...), an awaitable variant of the bulk lookup
 
 The implementation is REST-first (POST /api/core/content/record/search) with a Content API (OData)
-fallback (GET /RSAarcher/{endpoint}?$filter=...).
+fallback (GET /RSAarcher/{endpoint}?$filter=...). REST search is tried directly, without a probe request;
+a 404/405 answer switches the module to the Content API for a while, and repeated server errors open a
+circuit breaker that does the same for all modules.
+
+Every search asks the server for the narrowest projection it needs:
+- REST single-value search: ReturnFields ["Id"]
+- REST multi-value search: ReturnFields ["Id", "<field id>"], the field value being needed to group results
+- Content API search: $select={endpoint}_Id,{field DisplayName}
 
 This module is written to match the style in archer_instance.py and to use the existing
 ArcherInstance surface (session header, api_url_base, content_api_url_base, helpers).
 """
 from __future__ import annotations
 
+import asyncio
+import itertools
+import json
 import logging
+import threading
+import time
 import urllib.parse
-from typing import Dict, List, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import ijson  # optional: stream-parse large Content API responses
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # optional: faster JSON encode/decode of request bodies and responses
+except ImportError:
+    orjson = None
 
 log = logging.getLogger(__name__)
 
+# Search token used when a Values List value cannot be resolved to a value id
+_VALUES_LIST_NO_MATCH = "__CLINE_VALUES_LIST_NO_MATCH__"
+
+# Upper bound on concurrent requests issued by bulk lookups that cannot be collapsed into one search
+_MAX_BULK_WORKERS = 16
+
+# Seconds REST search is skipped for a module after it answered 404/405, before it is tried again
+_REST_UNSUPPORTED_TTL = 600.0
+
+# Connection pool size of the searcher's own session, matched to the bulk worker count
+_POOL_SIZE = _MAX_BULK_WORKERS
+
+# Circuit breaker: after this many consecutive REST server errors or timeouts, REST search is skipped
+# (in favour of the Content API) for _REST_BREAKER_COOLDOWN seconds
+_REST_BREAKER_THRESHOLD = 5
+_REST_BREAKER_COOLDOWN = 30.0
+
+# Request errors after which a REST search is failed over rather than treated as "no result"
+_TRANSIENT_REQUEST_ERRORS = (requests.Timeout, requests.ConnectionError, requests.exceptions.RetryError)
+
+# Content API responses at least this large (or of unknown length) are stream-parsed when ijson is installed
+_STREAM_THRESHOLD = 64 * 1024
+
+# Number of (app, field, value) -> record id lookups remembered by a RecordSearcher
+_LOOKUP_CACHE_SIZE = 4096
+
+# Pre-serialized REST single-value search body: (module id, page size, field id, JSON-encoded value)
+_REST_BODY_TMPL = (
+    b'{"ModuleId":%d,"Page":{"Start":0,"Size":%d},'
+    b'"Filters":[{"FieldId":%d,"Operator":"Equals","Value":%s}],"ReturnFields":["Id"]}'
+)
+
+# Record ids kept per searched value by batched searches: two are enough to report an ambiguous match
+_IDS_PER_VALUE = 2
+
+# Values per OR-joined Content API filter, and the URL-encoded filter length kept under to stay within URL limits
+_ODATA_OR_CHUNK = 50
+_ODATA_FILTER_MAX_LEN = 1500
+
+
+def _json_loads(content: bytes):
+    """Decode a JSON response body, with orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _json_dumps(obj) -> bytes:
+    """Encode a JSON request body, with orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _scan_record_id(item) -> Optional[int]:
+    """Return the record id of a search result item of any known shape, or None if it carries no id."""
+    if not isinstance(item, dict):
+        return None
+    if isinstance(item.get("RequestedObject"), dict):
+        rid = item["RequestedObject"].get("Id")
+    else:
+        rid = None
+        for k, v in item.items():
+            if k.lower().endswith("_id") or k.lower() == "id":
+                rid = v
+                break
+    if isinstance(rid, int):
+        return rid or None
+    return int(rid) if rid else None
+
+
+def _make_id_extractor(sample, preferred_key: Optional[str] = None) -> Optional[Callable[[object], Optional[int]]]:
+    """Inspect one search result item and return a function extracting the record id from items of its shape.
+
+    Returns None if sample carries no recognizable id.
+    """
+    if not isinstance(sample, dict):
+        return None
+
+    if isinstance(sample.get("RequestedObject"), dict):
+        def extract(item):
+            try:
+                rid = item["RequestedObject"]["Id"]
+            except (KeyError, TypeError):
+                return None
+            # ids normally arrive as ints; only strings need converting
+            if isinstance(rid, int):
+                return rid or None
+            return int(rid) if rid else None
+        return extract
+
+    if preferred_key is not None and preferred_key in sample:
+        key = preferred_key
+    else:
+        key = next((k for k in sample if k.lower().endswith("_id") or k.lower() == "id"), None)
+        if key is None:
+            return None
+
+    def extract(item):
+        try:
+            rid = item[key]
+        except (KeyError, TypeError):
+            return None
+        if isinstance(rid, int):
+            return rid or None
+        return int(rid) if rid else None
+    return extract
+
+
+def _group_ids_by_value_py(
+    items: Iterable,
+    field_key: str,
+    id_key: str,
+    grouped: Optional[Dict[str, List[int]]] = None,
+    limit: int = _IDS_PER_VALUE,
+) -> Optional[Dict[str, List[int]]]:
+    """Group the record ids of flat search result items (id and field value at the top level) by
+    lowercased field value, adding to grouped when given. At most limit ids are kept per value.
+
+    Returns None if an item with a record id has no field value, as it cannot be mapped to a value.
+    Pure-Python version of the compiled rsa_archer._fast.group_ids_by_value, which is used instead when built.
+    """
+    if grouped is None:
+        grouped = {}
+    for item in items:
+        try:
+            rid = item[id_key]
+        except (KeyError, TypeError):
+            continue
+        if not rid:
+            continue
+        if not isinstance(rid, int):
+            rid = int(rid)
+        raw = item.get(field_key)
+        if isinstance(raw, list):
+            raw = [x for x in raw if x is not None]
+        elif raw is not None:
+            raw = [raw]
+        if not raw:
+            return None
+        for value in raw:
+            key = str(value).lower()
+            bucket = grouped.get(key)
+            if bucket is None:
+                grouped[key] = [rid]
+            elif len(bucket) < limit and rid not in bucket:
+                bucket.append(rid)
+    return grouped
+
+
+try:
+    from rsa_archer._fast import group_ids_by_value as _group_ids_by_value  # optional: compiled with Cython
+except ImportError:
+    _group_ids_by_value = _group_ids_by_value_py
+
+
+def escape_odata(value) -> str:
+    """Escape a value for use inside a single-quoted OData string literal (' becomes '')."""
+    return str(value).replace("'", "''")
+
 
 class AmbiguousMatch(Exception):
     """Raised when a lookup value resolves to multiple record ids.
@@ -34,33 +221,152 @@ class AmbiguousMatch(Exception):
         self.details = details
 
 
+class _TransientError(Exception):
+    """Raised by REST search helpers on 5xx responses, timeouts and connection errors."""
+
+
+class _RestUnsupported(Exception):
+    """Raised by REST search helpers when the search endpoint answers 404/405."""
+
+
 class RecordSearcher:
     """Search for record IDs by application name, field DisplayName and value.
 
     Usage:
         rs = RecordSearcher(archer_instance)
         rid = rs.get_record_id_by_field("App", "Ticket #", "INC-123")
+
+    All requests go through one requests.Session so connections are kept alive between searches.
+    The session is taken from the `session` argument, then `archer_instance.session`, and is
+    otherwise created with a pooled, retrying HTTPS adapter.
     """
 
-    def __init__(self, archer_instance):
+    def __init__(self, archer_instance, session: Optional[requests.Session] = None):
         self.archer = archer_instance
         self.header = self.archer.header
+        self._session = session or getattr(archer_instance, "session", None) or self._make_session()
+        # module_id -> (REST search usable, monotonic expiry time); absent means try REST
+        self._rest_supported: Dict[int, Tuple[bool, float]] = {}
+        # REST circuit breaker state: consecutive failures and monotonic time until which REST is skipped
+        self._rest_fail_count = 0
+        self._rest_open_until = 0.0
+        self._breaker_lock = threading.Lock()
+        # app_name -> content API endpoint url
+        self._endpoint_cache: Dict[str, Optional[str]] = {}
+        # (app_name, field DisplayName, value) -> values list value id
+        self._vl_cache: Dict[Tuple[str, str, str], Union[str, int]] = {}
+        # app_name -> {lowercased field DisplayName: field id}
+        self._lower_name_index: Dict[str, Dict[str, int]] = {}
+        # app_name -> raw application level id captured when the application was loaded
+        self._module_ids: Dict[str, str] = {}
+        # (app_name, lowercased field DisplayName, value) -> record id, least recently used first
+        self._lookup_cache: "OrderedDict[Tuple[str, str, str], int]" = OrderedDict()
+        self._lookup_cache_lock = threading.Lock()
+        # search url or Content API endpoint -> record id extractor for its response shape
+        self._id_extractors: Dict[str, Callable[[object], Optional[int]]] = {}
+
+    @staticmethod
+    def _make_session() -> requests.Session:
+        """Create a session with connection pooling and retries on gateway errors."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=_POOL_SIZE,
+            pool_maxsize=_POOL_SIZE,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+        )
+        session.mount("https://", adapter)
+        return session
+
+    def invalidate_cache(self) -> None:
+        """Forget cached server capabilities, metadata and lookup results so they are resolved again on next use."""
+        self._rest_supported.clear()
+        self._rest_fail_count = 0
+        self._rest_open_until = 0.0
+        self._endpoint_cache.clear()
+        self._vl_cache.clear()
+        self._lower_name_index.clear()
+        self._module_ids.clear()
+        self.invalidate()
+
+    def invalidate(self, app_name: Optional[str] = None) -> None:
+        """Forget cached lookup results, for one application or all of them.
+
+        Call after writing records whose searched field values may have changed.
+        """
+        with self._lookup_cache_lock:
+            if app_name is None:
+                self._lookup_cache.clear()
+            else:
+                for key in [k for k in self._lookup_cache if k[0] == app_name]:
+                    del self._lookup_cache[key]
+
+    def _cached_lookup(self, key: Tuple[str, str, str]) -> Optional[int]:
+        """Return a cached record id (marking it recently used) or None."""
+        with self._lookup_cache_lock:
+            rid = self._lookup_cache.get(key)
+            if rid is not None:
+                self._lookup_cache.move_to_end(key)
+            return rid
+
+    def _cache_lookup(self, key: Tuple[str, str, str], rid: int) -> None:
+        """Remember a found record id, evicting the least recently used entry when full."""
+        with self._lookup_cache_lock:
+            self._lookup_cache[key] = rid
+            self._lookup_cache.move_to_end(key)
+            if len(self._lookup_cache) > _LOOKUP_CACHE_SIZE:
+                self._lookup_cache.popitem(last=False)
+
+    def _load_application(self, app_name: str) -> None:
+        """Make app_name the archer instance's current application, unless it already is.
+
+        Values List helpers of the archer instance read the metadata of its current application.
+        Archer objects without current_app_name are always (re)loaded.
+        """
+        if getattr(self.archer, "current_app_name", None) != app_name:
+            self.archer.from_application(app_name)
+
+    def _application_index(self, app_name: str) -> Dict[str, int]:
+        """Return the lowercased DisplayName -> field id index of an application, loading it once."""
+        idx = self._lower_name_index.get(app_name)
+        if idx is None:
+            self._load_application(app_name)
+            if getattr(self.archer, "current_app_name", app_name) != app_name:
+                # Load failed: application_fields_json may still hold another application's fields
+                return {}
+            af = self.archer.application_fields_json
+            # application_fields_json stores name -> id entries where keys are strings
+            idx = {key.lower(): val for key, val in af.items() if isinstance(key, str)}
+            if idx:
+                # An empty index means metadata failed to load; try again on next call
+                self._lower_name_index[app_name] = idx
+                self._module_ids[app_name] = self.archer.application_level_id
+        return idx
 
     def _resolve_field_id_by_display_name(self, app_name: str, field_display_name: str) -> int:
         """Resolve a field DisplayName to its internal field id (case-insensitive)."""
-        # Ensure application metadata is loaded
-        self.archer.from_application(app_name)
-        af = self.archer.application_fields_json
+        field_id = self._application_index(app_name).get(field_display_name.lower())
+        if field_id is None:
+            raise ValueError(
+                f'Field with DisplayName "{field_display_name}" not found in application "{app_name}"'
+            )
+        return field_id
 
-        target_lower = field_display_name.lower()
-        for key, val in af.items():
-            # application_fields_json stores name -> id entries where keys are strings
-            if isinstance(key, str) and key.lower() == target_lower:
-                return val
+    def _resolve_module_id(self, app_name: str) -> int:
+        """Return the module (application level) id of an application loaded by _application_index."""
+        module_id_raw = self._module_ids.get(app_name, self.archer.application_level_id)
+        try:
+            return int(module_id_raw)
+        except Exception:
+            # Fallback: try to coerce or raise
+            try:
+                return int(str(module_id_raw))
+            except Exception:
+                raise RuntimeError(f"Invalid application level id: {module_id_raw}")
 
-        raise ValueError(
-            f'Field with DisplayName "{field_display_name}" not found in application "{app_name}"'
-        )
+    def _resolve_lookup_context(self, app_name: str, field_display_name: str) -> Tuple[int, int]:
+        """Return (field id, module id) for an application field."""
+        field_id = self._resolve_field_id_by_display_name(app_name, field_display_name)
+        return field_id, self._resolve_module_id(app_name)
 
     def _is_values_list(self, field_id: int) -> bool:
         """Return True if given field id is a Values List (type == 4 in this codebase)."""
@@ -73,41 +379,92 @@ class RecordSearcher:
         return False
 
     def _get_value_or_value_id(
-        self, field_display_name: str, field_id: int, field_value: str
+        self, app_name: str, field_display_name: str, field_id: int, field_value: str
     ) -> Union[str, int]:
         """Return appropriate search token: either raw string or internal value id for values lists."""
         if self._is_values_list(field_id):
+            key = (app_name, field_display_name, field_value)
+            if key in self._vl_cache:
+                return self._vl_cache[key]
             # existing helper returns a list of ids for a matched value
+            self._load_application(app_name)
             ids = self.archer.get_value_id_by_field_name_and_value(field_display_name, field_value)
             if not ids:
-                # No matching value in the values list
-                return "__CLINE_VALUES_LIST_NO_MATCH__"
+                # No matching value in the values list (not cached: the helper also returns None on errors)
+                return _VALUES_LIST_NO_MATCH
+            self._vl_cache[key] = ids[0]
             return ids[0]
         else:
             return field_value
 
-    def _supports_rest_search(self, module_id: int) -> bool:
-        """Probe the REST content record search endpoint to see if it's available.
+    def _get_values_or_value_ids(
+        self, app_name: str, field_display_name: str, field_id: int, values: List[str]
+    ) -> Dict[str, Union[str, int]]:
+        """Bulk variant of _get_value_or_value_id: map each value to its search token.
 
-        Returns True if the endpoint looks supported, False if 404/405 or request fails.
+        Values List value ids are resolved with one call when the archer instance offers
+        get_value_ids_by_field_name_and_values, else value by value.
         """
-        api_url = f"{self.archer.api_url_base}core/content/record/search"
-        headers = dict(self.header)
-        headers["Content-type"] = "application/json"
+        batch = getattr(self.archer, "get_value_ids_by_field_name_and_values", None)
+        if batch is None or not self._is_values_list(field_id):
+            tokens: Dict[str, Union[str, int]] = {}
+            for v in values:
+                try:
+                    tokens[v] = self._get_value_or_value_id(app_name, field_display_name, field_id, v)
+                except Exception as e:
+                    log.debug("Value resolution for %s raised error: %s", v, e)
+                    tokens[v] = _VALUES_LIST_NO_MATCH
+            return tokens
 
-        probe_body = {
-            "ModuleId": module_id,
-            "Page": {"Start": 0, "Size": 1},
-            "Filters": [{"FieldId": 0, "Operator": "Equals", "Value": "__CLINE_PROBE__"}],
-        }
-        try:
-            resp = requests.post(api_url, headers=headers, json=probe_body, verify=False, timeout=10)
-            if resp.status_code in (404, 405):
-                return False
-            # Any other response code with JSON likely indicates the endpoint exists (even if filter is invalid)
-            return True
-        except Exception:
+        missing = [v for v in dict.fromkeys(values) if (app_name, field_display_name, v) not in self._vl_cache]
+        if missing:
+            try:
+                self._load_application(app_name)
+                found = batch(field_display_name, missing) or {}
+            except Exception as e:
+                log.debug("Values list resolution for %s raised error: %s", field_display_name, e)
+                found = {}
+            for v, ids in found.items():
+                if ids:
+                    self._vl_cache[(app_name, field_display_name, v)] = ids[0]
+        return {v: self._vl_cache.get((app_name, field_display_name, v), _VALUES_LIST_NO_MATCH) for v in values}
+
+    def _rest_search_available(self, module_id: int) -> bool:
+        """Return False while REST search is known to be unsupported or failing for a module, else True.
+
+        No request is made: REST search is tried optimistically and the searches themselves report
+        404/405 (see _mark_rest_unsupported) and server errors (see _record_rest_failure).
+        """
+        if self._rest_circuit_open():
             return False
+        cached = self._rest_supported.get(module_id)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+        return True
+
+    def _mark_rest_unsupported(self, module_id: int) -> None:
+        """Use the Content API for a module until _REST_UNSUPPORTED_TTL has passed."""
+        log.debug("REST search not supported for module %s, using Content API", module_id)
+        self._rest_supported[module_id] = (False, time.monotonic() + _REST_UNSUPPORTED_TTL)
+
+    def _rest_circuit_open(self) -> bool:
+        """Return True while REST search is skipped after repeated server errors."""
+        return time.monotonic() < self._rest_open_until
+
+    def _record_rest_success(self) -> None:
+        """Close the circuit breaker's failure streak after a REST search got an answer."""
+        with self._breaker_lock:
+            self._rest_fail_count = 0
+
+    def _record_rest_failure(self) -> None:
+        """Count a REST server error or timeout, opening the circuit after _REST_BREAKER_THRESHOLD in a row."""
+        with self._breaker_lock:
+            self._rest_fail_count += 1
+            if self._rest_fail_count >= _REST_BREAKER_THRESHOLD:
+                log.warning("REST search failed %s times in a row, using Content API for %ss",
+                            self._rest_fail_count, _REST_BREAKER_COOLDOWN)
+                self._rest_open_until = time.monotonic() + _REST_BREAKER_COOLDOWN
+                self._rest_fail_count = 0
 
     def _rest_search_record_ids(
         self, module_id: int, field_id: int, value: Union[str, int], limit: int = 2
@@ -115,155 +472,398 @@ class RecordSearcher:
         """Search using the REST content record search endpoint and return matching record ids.
 
         The request/response schema can vary between Archer versions; this implementation is defensive
-        and parses common shapes.
+        and parses common shapes. Raises _RestUnsupported on 404/405 and _TransientError on server errors
+        and timeouts.
         """
         api_url = f"{self.archer.api_url_base}core/content/record/search"
         headers = dict(self.header)
         headers["Content-type"] = "application/json"
 
-        body = {
-            "ModuleId": module_id,
-            "Page": {"Start": 0, "Size": limit},
-            "Filters": [{"FieldId": field_id, "Operator": "Equals", "Value": value}],
-            "ReturnFields": ["Id"],
-        }
-
         try:
-            resp = requests.post(api_url, headers=headers, json=body, verify=False, timeout=15)
+            body = _REST_BODY_TMPL % (module_id, limit, field_id, _json_dumps(value))
+            resp = self._session.post(api_url, headers=headers, data=body, verify=False, timeout=15)
+            if resp.status_code in (404, 405):
+                raise _RestUnsupported(f"REST search returned status {resp.status_code}")
+            if resp.status_code >= 500:
+                raise _TransientError(f"REST search returned status {resp.status_code}")
             if resp.status_code >= 400:
-                # Treat error responses as no results for safety
+                # Treat client error responses as no results for safety
                 log.debug("REST search returned status %s: %s", resp.status_code, resp.text)
                 return []
 
-            data = resp.json()
-
-            ids: List[int] = []
+            data = _json_loads(resp.content)
 
             # Common response shapes:
             # - list of objects, each with RequestedObject -> Id
             # - dict with 'value' list of objects, each with {<endpoint>_Id: id} or 'Id'
+            # - a single object with RequestedObject -> Id
             if isinstance(data, list):
-                for item in data:
-                    rid = item.get("RequestedObject", {}).get("Id")
-                    if rid:
-                        ids.append(int(rid))
+                items = data
             elif isinstance(data, dict):
-                # Case: {"value": [ {...}, ... ]}
-                if "value" in data and isinstance(data["value"], list):
-                    for item in data["value"]:
-                        # try RequestedObject -> Id
-                        rid = None
-                        if isinstance(item, dict):
-                            if "RequestedObject" in item:
-                                rid = item["RequestedObject"].get("Id")
-                            else:
-                                # look for any key that endswith _Id or 'Id'
-                                for k, v in item.items():
-                                    if k.lower().endswith("_id") or k.lower() == "id":
-                                        rid = v
-                                        break
-                        if rid:
-                            ids.append(int(rid))
-                else:
-                    # Unexpected dict shape: try RequestedObject at top-level
-                    rid = data.get("RequestedObject", {}).get("Id")
-                    if rid:
-                        ids.append(int(rid))
+                items = data["value"] if isinstance(data.get("value"), list) else [data]
             else:
                 log.debug("REST search returned unrecognized JSON shape: %s", type(data))
+                items = []
+
+            ids = self._extract_ids(items, api_url)
 
             return ids
 
+        except (_RestUnsupported, _TransientError):
+            raise
+        except _TRANSIENT_REQUEST_ERRORS as e:
+            raise _TransientError(f"REST search request failed: {e}") from e
         except Exception as e:
             log.error("REST search failed: %s", e)
             return []
 
+    def _id_extractor(
+        self, shape_key: str, sample, preferred_key: Optional[str] = None
+    ) -> Callable[[object], Optional[int]]:
+        """Return the id extractor cached for a response shape, detecting the shape again from sample if needed."""
+        extract = self._id_extractors.get(shape_key)
+        if extract is None or extract(sample) is None:
+            extract = _make_id_extractor(sample, preferred_key)
+            if extract is None:
+                # No recognizable id in sample: inspect every item
+                return _scan_record_id
+            self._id_extractors[shape_key] = extract
+        return extract
+
+    def _extract_ids(self, items: Iterable, shape_key: str, preferred_key: Optional[str] = None) -> List[int]:
+        """Return the record ids of search result items, all assumed to share the shape of the first one."""
+        it = iter(items)
+        first = next(it, None)
+        if first is None:
+            return []
+        extract = self._id_extractor(shape_key, first, preferred_key)
+        first_id = extract(first)
+        ids = [] if first_id is None else [first_id]
+        ids.extend(rid for rid in map(extract, it) if rid is not None)
+        return ids
+
+    @staticmethod
+    def _extract_field_keys(item, field_id: Optional[int], field_display_name: str) -> List[str]:
+        """Return the lowercased field value(s) of a search result item, used to group results by value.
+
+        Handles the field keyed by DisplayName or id at the top level, and the FieldContents shape.
+        Values List fields may return a list of value ids (or a dict with ValuesListIds).
+        """
+        if not isinstance(item, dict):
+            return []
+        obj = item["RequestedObject"] if isinstance(item.get("RequestedObject"), dict) else item
+
+        raw = None
+        if field_display_name in obj:
+            raw = obj[field_display_name]
+        elif field_id is not None and str(field_id) in obj:
+            raw = obj[str(field_id)]
+        elif field_id is not None and isinstance(obj.get("FieldContents"), dict):
+            fc = obj["FieldContents"]
+            entry = fc.get(str(field_id), fc.get(field_id))
+            raw = entry.get("Value") if isinstance(entry, dict) else entry
+
+        if isinstance(raw, dict):
+            raw = raw.get("ValuesListIds", raw.get("Value"))
+        if raw is None:
+            return []
+        if isinstance(raw, list):
+            return [str(x).lower() for x in raw if x is not None]
+        return [str(raw).lower()]
+
+    def _rest_search_record_ids_multi(
+        self,
+        module_id: int,
+        field_id: int,
+        values: List[Union[str, int]],
+        field_display_name: str,
+        limit_per_value: int = 2,
+    ) -> Optional[Dict[str, List[int]]]:
+        """Search many values with a single REST content record search using the "In" operator.
+
+        Returns a mapping lowercased field value -> matching record ids, or None if the server
+        rejected the request (e.g. "In" operator not supported) or the results filled the page (some
+        values' records may be missing), so the caller can fall back to searching value by value. Raises _RestUnsupported on 404/405 and _TransientError on server
+        errors and timeouts.
+        """
+        api_url = f"{self.archer.api_url_base}core/content/record/search"
+        headers = dict(self.header)
+        headers["Content-type"] = "application/json"
+
+        page_size = len(values) * limit_per_value
+        body = {
+            "ModuleId": module_id,
+            "Page": {"Start": 0, "Size": page_size},
+            "Filters": [{"FieldId": field_id, "Operator": "In", "Values": values}],
+            "ReturnFields": ["Id", str(field_id)],
+        }
+
+        try:
+            resp = self._session.post(api_url, headers=headers, data=_json_dumps(body), verify=False, timeout=15)
+            if resp.status_code in (404, 405):
+                raise _RestUnsupported(f"REST multi-value search returned status {resp.status_code}")
+            if resp.status_code >= 500:
+                raise _TransientError(f"REST multi-value search returned status {resp.status_code}")
+            if resp.status_code >= 400:
+                log.debug("REST multi-value search returned status %s: %s", resp.status_code, resp.text)
+                return None
+
+            data = _json_loads(resp.content)
+            if isinstance(data, dict):
+                items = data["value"] if isinstance(data.get("value"), list) else [data]
+            elif isinstance(data, list):
+                items = data
+            else:
+                log.debug("REST multi-value search returned unrecognized JSON shape: %s", type(data))
+                return None
+            if len(items) >= page_size:
+                # Values with many matches may have pushed other values' records off the page
+                log.debug("REST multi-value search filled its page of %s, searching value by value", page_size)
+                return None
+
+            grouped: Dict[str, List[int]] = {}
+            extract = self._id_extractor(api_url, items[0]) if items else None
+            # local aliases keep attribute lookups out of the per-record loop
+            setdefault = grouped.setdefault
+            field_keys = self._extract_field_keys
+            for item in items:
+                rid = extract(item)
+                if rid is None:
+                    continue
+                keys = field_keys(item, field_id, field_display_name)
+                if not keys:
+                    # The record came back without the searched field, so it cannot be mapped to a value
+                    log.debug("REST multi-value search result lacks field %s, searching value by value", field_id)
+                    return None
+                for key in keys:
+                    bucket = setdefault(key, [])
+                    # the page holds limit_per_value rows per value; more ids than that add nothing
+                    if len(bucket) < limit_per_value and rid not in bucket:
+                        bucket.append(rid)
+
+            return grouped
+
+        except (_RestUnsupported, _TransientError):
+            raise
+        except _TRANSIENT_REQUEST_ERRORS as e:
+            raise _TransientError(f"REST multi-value search request failed: {e}") from e
+        except Exception as e:
+            log.error("REST multi-value search failed: %s", e)
+            return None
+
     def _get_grc_endpoint_url(self, app_name: str) -> Optional[str]:
-        """Discover the content API endpoint url for an application (non-printing)."""
+        """Discover the content API endpoint url for an application (non-printing).
+
+        Completed discoveries are cached per app_name; failed requests are retried on next call.
+        """
+        if app_name in self._endpoint_cache:
+            return self._endpoint_cache[app_name]
         try:
             api_url = self.archer.content_api_url_base
-            resp = requests.get(api_url, headers=self.header, verify=False, timeout=15)
-            data = resp.json()
+            resp = self._session.get(api_url, headers=self.header, verify=False, timeout=15)
+            if resp.status_code >= 400:
+                # e.g. an expired session: not an answer about the application, so not cached
+                log.debug("Content API endpoint discovery returned %s: %s", resp.status_code, resp.text)
+                return None
+            data = _json_loads(resp.content)
             # Expect data["value"] as a list of endpoints with 'name' and 'url'
+            endpoint = None
             candidates = []
             for ep in data.get("value", []):
                 name = ep.get("name", "") or ""
                 url = ep.get("url")
                 if name == app_name:
-                    return url
+                    endpoint = url
+                    break
                 if app_name in name:
                     candidates.append(url)
             # prefer any candidate that contains the name
-            if candidates:
-                return candidates[0]
+            if endpoint is None and candidates:
+                endpoint = candidates[0]
+            self._endpoint_cache[app_name] = endpoint
+            return endpoint
         except Exception as e:
             log.debug("Content API endpoint discovery failed: %s", e)
         return None
 
+    @staticmethod
+    def _iter_odata_values(resp):
+        """Yield the items of an OData {"value": [...]} response.
+
+        Large responses are parsed incrementally with ijson (when installed) so only one record is
+        materialized at a time; small ones are decoded in one go. The response must be requested with stream=True.
+        """
+        length = resp.headers.get("Content-Length")
+        if ijson is not None and (length is None or int(length) >= _STREAM_THRESHOLD):
+            resp.raw.decode_content = True
+            yield from ijson.items(resp.raw, "value.item")
+        else:
+            yield from _json_loads(resp.content).get("value", [])
+
     def _contentapi_search_record_ids(
         self, endpoint_url: str, field_display_name: str, field_value: str
     ) -> List[int]:
         """Query the Content API OData endpoint for records matching field_display_name eq field_value."""
-        # Build filter and select
-        filter_expr = f"{field_display_name} eq '{field_value}'"
-        qs_filter = urllib.parse.quote_plus(filter_expr)
+        # Build filter and select; requests takes care of query string encoding
         select_field = f"{endpoint_url}_Id"
-        api_url = f"{self.archer.content_api_url_base}{endpoint_url}?$filter={qs_filter}&$select={select_field}"
+        params = {
+            "$filter": f"{field_display_name} eq '{escape_odata(field_value)}'",
+            "$select": f"{select_field},{field_display_name}",
+        }
+        api_url = f"{self.archer.content_api_url_base}{endpoint_url}"
 
+        resp = None
         try:
-            resp = requests.get(api_url, headers=self.header, verify=False, timeout=15)
+            resp = self._session.get(
+                api_url, params=params, headers=self.header, verify=False, timeout=15, stream=True
+            )
             if resp.status_code >= 400:
                 log.debug("Content API search returned %s: %s", resp.status_code, resp.text)
                 return []
 
-            data = resp.json()
-            ids: List[int] = []
-
-            for item in data.get("value", []):
-                # Try property named like {endpoint_url}_Id first
-                rid = None
-                if isinstance(item, dict):
-                    rid = item.get(select_field)
-                    if rid is None:
-                        # fallback to any key ending in _Id or 'Id'
-                        for k, v in item.items():
-                            if k.lower().endswith("_id") or k.lower() == "id":
-                                rid = v
-                                break
-                if rid is not None:
-                    ids.append(int(rid))
-
-            return ids
+            # Prefer the property named like {endpoint_url}_Id
+            return self._extract_ids(self._iter_odata_values(resp), endpoint_url, preferred_key=select_field)
         except Exception as e:
             log.error("Content API search failed: %s", e)
             return []
+        finally:
+            if resp is not None:
+                # release the connection even if a streamed body was not fully read
+                resp.close()
+
+    def _contentapi_search_record_ids_multi(
+        self, endpoint_url: str, field_display_name: str, values: List[str]
+    ) -> Optional[Dict[str, List[int]]]:
+        """Query the Content API for many values with OR-joined $filter clauses, chunked to keep URLs short.
+
+        Returns a mapping lowercased field value -> matching record ids, or None if any chunk failed
+        or returned a record without the field value, so the caller can fall back to searching value by value.
+        """
+        select_field = f"{endpoint_url}_Id"
+        api_url = f"{self.archer.content_api_url_base}{endpoint_url}"
+
+        # Split values into filters of at most _ODATA_OR_CHUNK clauses and _ODATA_FILTER_MAX_LEN characters once
+        # URL-encoded (quotes and non-ASCII characters grow when percent-encoded; " or " becomes "+or+")
+        filters: List[str] = []
+        clauses: List[str] = []
+        length = 0
+        for v in dict.fromkeys(values):
+            clause = f"{field_display_name} eq '{escape_odata(v)}'"
+            encoded_len = len(urllib.parse.quote_plus(clause))
+            if clauses and (len(clauses) >= _ODATA_OR_CHUNK or length + encoded_len + 4 > _ODATA_FILTER_MAX_LEN):
+                filters.append(" or ".join(clauses))
+                clauses, length = [], 0
+            clauses.append(clause)
+            length += encoded_len + 4
+        if clauses:
+            filters.append(" or ".join(clauses))
+
+        grouped: Dict[str, List[int]] = {}
+        for filter_expr in filters:
+            params = {"$filter": filter_expr, "$select": f"{select_field},{field_display_name}"}
+            resp = None
+            try:
+                resp = self._session.get(
+                    api_url, params=params, headers=self.header, verify=False, timeout=15, stream=True
+                )
+                if resp.status_code >= 400:
+                    log.debug("Content API multi-value search returned %s: %s", resp.status_code, resp.text)
+                    return None
+
+                items = iter(self._iter_odata_values(resp))
+                first = next(items, None)
+                if first is None:
+                    continue
+                items = itertools.chain((first,), items)
+                if isinstance(first, dict) and select_field in first and field_display_name in first:
+                    # the $select'ed flat shape: group in one pass (compiled when available)
+                    if _group_ids_by_value(items, field_display_name, select_field, grouped) is None:
+                        log.debug("Content API multi-value search result lacks %s, searching value by value",
+                                  field_display_name)
+                        return None
+                    continue
+
+                extract = self._id_extractor(endpoint_url, first, preferred_key=select_field)
+                setdefault = grouped.setdefault
+                field_keys = self._extract_field_keys
+                for item in items:
+                    rid = extract(item)
+                    if rid is None:
+                        continue
+                    keys = field_keys(item, None, field_display_name)
+                    if not keys:
+                        # e.g. the server ignored the field in $select, so the record cannot be mapped to a value
+                        log.debug("Content API multi-value search result lacks %s, searching value by value",
+                                  field_display_name)
+                        return None
+                    for key in keys:
+                        bucket = setdefault(key, [])
+                        if len(bucket) < _IDS_PER_VALUE and rid not in bucket:
+                            bucket.append(rid)
+            except Exception as e:
+                log.error("Content API multi-value search failed: %s", e)
+                return None
+            finally:
+                if resp is not None:
+                    resp.close()
+
+        return grouped
 
     def get_record_id_by_field(
         self, app_name: str, field_display_name: str, field_value: str
     ) -> Optional[int]:
-        """Return a single matching record id or None. Raise AmbiguousMatch if multiple found."""
+        """Return a single matching record id or None. Raise AmbiguousMatch if multiple found.
+
+        Found ids are cached; misses are not, so a record created after a miss is found by the next lookup.
+        """
+        cache_key = (app_name, field_display_name.lower(), field_value)
+        rid = self._cached_lookup(cache_key)
+        if rid is not None:
+            return rid
+
         # Resolve metadata
-        field_id = self._resolve_field_id_by_display_name(app_name, field_display_name)
+        field_id, module_id = self._resolve_lookup_context(app_name, field_display_name)
 
-        module_id_raw = self.archer.application_level_id
-        try:
-            module_id = int(module_id_raw)
-        except Exception:
-            # Fallback: try to coerce or raise
-            try:
-                module_id = int(str(module_id_raw))
-            except Exception:
-                raise RuntimeError(f"Invalid application level id: {module_id_raw}")
+        use_rest = self._rest_search_available(module_id)
+        endpoint = None if use_rest else self._get_grc_endpoint_url(app_name)
 
-        # Prepare search value (value or internal id for values list)
-        search_token = self._get_value_or_value_id(field_display_name, field_id, field_value)
+        rid = self._get_record_id_resolved(
+            app_name, field_display_name, field_id, module_id, field_value, use_rest, endpoint
+        )
+        if rid is not None:
+            self._cache_lookup(cache_key, rid)
+        return rid
 
-        # Try REST search first
-        if self._supports_rest_search(module_id):
-            ids = self._rest_search_record_ids(module_id, field_id, search_token, limit=2)
-        else:
+    def _get_record_id_resolved(
+        self,
+        app_name: str,
+        field_display_name: str,
+        field_id: int,
+        module_id: int,
+        field_value: str,
+        use_rest: bool,
+        endpoint: Optional[str],
+    ) -> Optional[int]:
+        """Single lookup with field id, module id and search endpoint already resolved by the caller.
+
+        A REST server error or timeout, or an open REST circuit breaker, fails over to the Content API.
+        """
+        ids = None
+        if use_rest and not self._rest_circuit_open():
+            # Prepare search value (value or internal id for values list)
+            search_token = self._get_value_or_value_id(app_name, field_display_name, field_id, field_value)
+            try:
+                ids = self._rest_search_record_ids(module_id, field_id, search_token, limit=2)
+                self._record_rest_success()
+            except _RestUnsupported:
+                self._mark_rest_unsupported(module_id)
+            except _TransientError as e:
+                log.debug("REST search for value %s failed over to Content API: %s", field_value, e)
+                self._record_rest_failure()
+
+        if ids is None:
             # Fallback to Content API
-            endpoint = self._get_grc_endpoint_url(app_name)
+            endpoint = endpoint or self._get_grc_endpoint_url(app_name)
             if not endpoint:
                 # No endpoint discovered; return no results
                 return None
@@ -272,7 +872,7 @@ class RecordSearcher:
         if not ids:
             return None
         if len(ids) == 1:
-            return int(ids[0])
+            return ids[0]
         # multiple results -> ambiguous
         raise AmbiguousMatch(
             f"Multiple records found for value '{field_value}' in field '{field_display_name}'", details=ids
@@ -281,52 +881,181 @@ class RecordSearcher:
     def get_record_ids_by_field_bulk(
         self, app_name: str, field_display_name: str, values: List[str]
     ) -> Dict[str, Optional[int]]:
-        """Bulk lookup: return mapping value -> record id | None. If any values are ambiguous, raise AmbiguousMatch at end."""
+        """Bulk lookup: return mapping value -> record id | None. If any values are ambiguous, raise AmbiguousMatch at end.
+
+        When REST search is available all values are collapsed into a single "In" search; otherwise the Content
+        API is queried with OR-joined filters, a few dozen values per request. If the server rejects the batched
+        search, values are looked up concurrently, one request each.
+        Values already found by earlier lookups are answered from the lookup cache.
+        """
         results: Dict[str, Optional[int]] = {}
         ambiguities: Dict[str, List[int]] = {}
 
+        field_key = field_display_name.lower()
         for v in values:
-            try:
-                rid = self.get_record_id_by_field(app_name, field_display_name, v)
+            rid = self._cached_lookup((app_name, field_key, v))
+            if rid is not None:
                 results[v] = rid
-            except AmbiguousMatch as a:
-                # Normalize details into a list[int] for storage in ambiguities[v]
-                details = a.details if a.details else []
-                if isinstance(details, list):
-                    coerced: List[int] = []
-                    for x in details:
-                        try:
-                            coerced.append(int(x))
-                        except Exception:
-                            continue
-                    ambiguities[v] = coerced
-                elif isinstance(details, dict):
-                    flat: List[int] = []
-                    for val in details.values():
-                        if isinstance(val, list):
-                            for x in val:
-                                try:
-                                    flat.append(int(x))
-                                except Exception:
-                                    continue
-                        else:
-                            try:
-                                flat.append(int(val))
-                            except Exception:
-                                continue
-                    ambiguities[v] = flat
+        values = [v for v in values if v not in results]
+
+        if not values:
+            return results
+
+        try:
+            field_id, module_id = self._resolve_lookup_context(app_name, field_display_name)
+        except Exception as e:
+            # Keep bulk operation tolerant: no value can be looked up without field metadata
+            log.debug("Bulk lookup metadata resolution failed: %s", e)
+            results.update({v: None for v in values})
+            return results
+
+        grouped = None
+        tokens: Dict[str, Union[str, int]] = {}
+        use_rest = self._rest_search_available(module_id)
+        if use_rest:
+            tokens = self._get_values_or_value_ids(app_name, field_display_name, field_id, values)
+            searchable = list(dict.fromkeys(t for t in tokens.values() if t != _VALUES_LIST_NO_MATCH))
+            if searchable:
+                try:
+                    grouped = self._rest_search_record_ids_multi(
+                        module_id, field_id, searchable, field_display_name, limit_per_value=2
+                    )
+                    self._record_rest_success()
+                except _RestUnsupported:
+                    self._mark_rest_unsupported(module_id)
+                    use_rest = False
+                except _TransientError as e:
+                    log.debug("REST multi-value search failed over to Content API: %s", e)
+                    self._record_rest_failure()
+                    use_rest = False
+            else:
+                grouped = {}
+
+        endpoint = None
+        if grouped is None and not use_rest:
+            endpoint = self._get_grc_endpoint_url(app_name)
+            if endpoint:
+                # Content API filters on the user-facing value, also for values lists
+                tokens = {v: v for v in values}
+                grouped = self._contentapi_search_record_ids_multi(endpoint, field_display_name, values)
+
+        if grouped is not None and not self._grouped_ids_reachable(grouped, tokens):
+            # Some records came back under a value form no searched value maps to (e.g. 5.0 for "5")
+            log.debug("Batched search returned records not matching any searched value, searching value by value")
+            grouped = None
+
+        if grouped is not None:
+            for v, token in tokens.items():
+                if token == _VALUES_LIST_NO_MATCH:
+                    results[v] = None
+                    continue
+                ids = grouped.get(str(token).lower()) or grouped.get(str(v).lower(), [])
+                if len(ids) > 1:
+                    ambiguities[v] = list(ids)
+                    results[v] = None
                 else:
-                    try:
-                        ambiguities[v] = [int(details)]
-                    except Exception:
-                        ambiguities[v] = []
-                results[v] = None
-            except Exception as e:
-                # For other errors, log and map to None to keep bulk operation tolerant
-                log.debug("Lookup for value %s raised error: %s", v, e)
-                results[v] = None
+                    results[v] = ids[0] if ids else None
+        else:
+            self._bulk_lookup_per_value(
+                app_name, field_display_name, field_id, module_id, values, use_rest, endpoint, results, ambiguities
+            )
+
+        for v in values:
+            if results.get(v) is not None:
+                self._cache_lookup((app_name, field_key, v), results[v])
 
         if ambiguities:
             raise AmbiguousMatch("Ambiguous matches found for one or more input values", details=ambiguities)
 
         return results
+
+    @staticmethod
+    def _grouped_ids_reachable(grouped: Dict[str, List[int]], tokens: Dict[str, Union[str, int]]) -> bool:
+        """Return True if every record id of a batched search is found under the key of a searched value."""
+        keys = set()
+        for v, token in tokens.items():
+            if token != _VALUES_LIST_NO_MATCH:
+                keys.add(str(token).lower())
+                keys.add(str(v).lower())
+        reachable = {rid for key in keys for rid in grouped.get(key, ())}
+        return all(rid in reachable for ids in grouped.values() for rid in ids)
+
+    async def get_record_ids_by_field_bulk_async(
+        self, app_name: str, field_display_name: str, values: List[str]
+    ) -> Dict[str, Optional[int]]:
+        """Awaitable variant of get_record_ids_by_field_bulk for callers running an asyncio event loop.
+
+        The lookup runs in the loop's default executor so the loop is not blocked while waiting on Archer.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self.get_record_ids_by_field_bulk, app_name, field_display_name, values
+        )
+
+    def _bulk_lookup_per_value(
+        self,
+        app_name: str,
+        field_display_name: str,
+        field_id: int,
+        module_id: int,
+        values: List[str],
+        use_rest: bool,
+        endpoint: Optional[str],
+        results: Dict[str, Optional[int]],
+        ambiguities: Dict[str, List[int]],
+    ) -> None:
+        """Look up values one request each on a bounded thread pool, filling results and ambiguities in place."""
+        unique = list(dict.fromkeys(values))
+        # Pre-fill so results keep input order regardless of completion order
+        for v in unique:
+            results[v] = None
+
+        with ThreadPoolExecutor(max_workers=min(_MAX_BULK_WORKERS, len(unique))) as pool:
+            futures = {
+                pool.submit(
+                    self._get_record_id_resolved,
+                    app_name, field_display_name, field_id, module_id, v, use_rest, endpoint,
+                ): v
+                for v in unique
+            }
+            for future in as_completed(futures):
+                v = futures[future]
+                try:
+                    rid = future.result()
+                    results[v] = rid
+                except AmbiguousMatch as a:
+                    # Normalize details into a list[int] for storage in ambiguities[v]
+                    details = a.details if a.details else []
+                    if isinstance(details, list):
+                        coerced: List[int] = []
+                        for x in details:
+                            try:
+                                coerced.append(int(x))
+                            except Exception:
+                                continue
+                        ambiguities[v] = coerced
+                    elif isinstance(details, dict):
+                        flat: List[int] = []
+                        for val in details.values():
+                            if isinstance(val, list):
+                                for x in val:
+                                    try:
+                                        flat.append(int(x))
+                                    except Exception:
+                                        continue
+                            else:
+                                try:
+                                    flat.append(int(val))
+                                except Exception:
+                                    continue
+                        ambiguities[v] = flat
+                    else:
+                        try:
+                            ambiguities[v] = [int(details)]
+                        except Exception:
+                            ambiguities[v] = []
+                    results[v] = None
+                except Exception as e:
+                    # For other errors, log and map to None to keep bulk operation tolerant
+                    log.debug("Lookup for value %s raised error: %s", v, e)
+                    results[v] = None
@@ -1,7 +1,14 @@
+import asyncio
+import json
 import unittest
+import urllib.parse
 from unittest.mock import patch, Mock
 
-from rsa_archer.record_search import RecordSearcher, AmbiguousMatch
+import requests
+
+from rsa_archer import record_search
+from rsa_archer.archer_instance import ArcherInstance
+from rsa_archer.record_search import RecordSearcher, AmbiguousMatch, escape_odata
 
 
 class FakeArcher:
@@ -26,55 +33,62 @@ class FakeArcher:
 
 
 class MockResponse:
-    def __init__(self, status_code=200, json_data=None, text=""):
+    def __init__(self, status_code=200, json_data=None, text="", headers=None):
         self.status_code = status_code
         self._json = json_data or {}
+        self.content = json.dumps(self._json).encode("utf-8")
         self.text = text
+        self.headers = headers or {}
+        self.raw = Mock()
 
     def json(self):
         return self._json
 
+    def close(self):
+        pass
+
+
+def posted_body(call):
+    """Return the decoded JSON body of a mocked Session.post call."""
+    return json.loads(call.kwargs["data"])
+
 
 class TestRecordSearcher(unittest.TestCase):
     def setUp(self):
         self.arch = FakeArcher()
         self.rs = RecordSearcher(self.arch)
 
-    @patch("rsa_archer.record_search.requests.post")
+    @patch("rsa_archer.record_search.requests.Session.post")
     def test_rest_single_result(self, mock_post):
         # Prepare application field mapping
         self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
-        # Probe response (first POST) -> supported
-        probe_resp = MockResponse(status_code=200, json_data={})
-        # Search response (second POST) -> one result with RequestedObject Id
+        # Search response -> one result with RequestedObject Id
         search_payload = [
             {"RequestedObject": {"Id": 555}}
         ]
         search_resp = MockResponse(status_code=200, json_data=search_payload)
-        mock_post.side_effect = [probe_resp, search_resp]
+        mock_post.return_value = search_resp
 
         rid = self.rs.get_record_id_by_field("App", "Ticket Number", "SOME-VALUE")
         self.assertEqual(rid, 555)
 
-    @patch("rsa_archer.record_search.requests.post")
+    @patch("rsa_archer.record_search.requests.Session.post")
     def test_rest_no_result(self, mock_post):
         self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
-        probe_resp = MockResponse(status_code=200, json_data={})
         search_resp = MockResponse(status_code=200, json_data=[])  # empty list
-        mock_post.side_effect = [probe_resp, search_resp]
+        mock_post.return_value = search_resp
 
         rid = self.rs.get_record_id_by_field("App", "Ticket Number", "NOPE")
         self.assertIsNone(rid)
 
-    @patch("rsa_archer.record_search.requests.post")
+    @patch("rsa_archer.record_search.requests.Session.post")
     def test_rest_multiple_results_raises(self, mock_post):
         self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
-        probe_resp = MockResponse(status_code=200, json_data={})
         search_resp = MockResponse(status_code=200, json_data=[
             {"RequestedObject": {"Id": 1}},
             {"RequestedObject": {"Id": 2}},
         ])
-        mock_post.side_effect = [probe_resp, search_resp]
+        mock_post.return_value = search_resp
 
         with self.assertRaises(AmbiguousMatch) as cm:
             self.rs.get_record_id_by_field("App", "Ticket Number", "DUP")
@@ -82,7 +96,7 @@ class TestRecordSearcher(unittest.TestCase):
         # details may be None; check message
         self.assertIn("Multiple records found", str(exc))
 
-    @patch("rsa_archer.record_search.requests.post")
+    @patch("rsa_archer.record_search.requests.Session.post")
     def test_values_list_rest_search(self, mock_post):
         # Simulate field being a values list; application_fields_json must include id->info
         self.arch.application_fields_json = {"Status": 20, 20: {"Type": 4, "FieldId": 20}}
@@ -93,19 +107,85 @@ class TestRecordSearcher(unittest.TestCase):
             return []
         self.arch.get_value_id_by_field_name_and_value = fake_get_value
 
-        probe_resp = MockResponse(status_code=200, json_data={})
         search_resp = MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 777}}])
-        mock_post.side_effect = [probe_resp, search_resp]
+        mock_post.return_value = search_resp
 
         rid = self.rs.get_record_id_by_field("App", "Status", "Open")
         self.assertEqual(rid, 777)
 
-    @patch("rsa_archer.record_search.requests.post")
-    @patch("rsa_archer.record_search.requests.get")
+    def use_apps(self, apps):
+        """Make from_application load {app_name: (fields, level id, values list value id of "Open")}."""
+        def from_application(app_name):
+            fields, level_id, value_id = apps[app_name]
+            self.arch.application_fields_json.update(fields)
+            self.arch.application_level_id = level_id
+            self.arch.open_value_id = value_id
+            self.arch.current_app_name = app_name
+            return self.arch
+        self.arch.from_application = Mock(side_effect=from_application)
+        self.arch.get_value_id_by_field_name_and_value = Mock(
+            side_effect=lambda field_name, value: [self.arch.open_value_id]
+        )
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_values_list_ids_cached_per_app(self, mock_post):
+        self.use_apps({
+            "A": ({"Status": 20, 20: {"Type": 4, "FieldId": 20}}, "1", 901),
+            "B": ({"Status": 30, 30: {"Type": 4, "FieldId": 30}}, "2", 902),
+        })
+        mock_post.return_value = MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 777}}])
+
+        self.rs.get_record_id_by_field("A", "Status", "Open")
+        self.rs.get_record_id_by_field("B", "Status", "Open")
+        body = posted_body(mock_post.call_args)
+        self.assertEqual(body["ModuleId"], 2)
+        self.assertEqual(body["Filters"][0]["FieldId"], 30)
+        self.assertEqual(body["Filters"][0]["Value"], 902)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_values_list_resolved_against_target_app(self, mock_post):
+        self.use_apps({
+            "A": ({"Status": 20, 20: {"Type": 4, "FieldId": 20}}, "1", 901),
+            "B": ({"Status": 30, 30: {"Type": 4, "FieldId": 30}}, "2", 902),
+        })
+        mock_post.return_value = MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 777}}])
+
+        self.rs.get_record_id_by_field("A", "Status", "Open")
+        self.rs.get_record_id_by_field("B", "Status", "Open")
+        # A's field index is cached, but its Values Lists must not be read from B's metadata
+        self.rs.get_record_id_by_field("A", "Status", "Closed")
+        body = posted_body(mock_post.call_args)
+        self.assertEqual(body["ModuleId"], 1)
+        self.assertEqual(body["Filters"][0]["Value"], 901)
+        self.assertEqual(self.arch.from_application.call_count, 3)
+
+    def test_failed_load_not_indexed_with_other_app_fields(self):
+        self.use_apps({
+            "A": ({"Ticket": 10, 10: {"Type": 1, "FieldId": 10}}, "100", None),
+            "B": ({"Ticket": 20, 20: {"Type": 1, "FieldId": 20}}, "200", None),
+        })
+        load = self.arch.from_application.side_effect
+        fail_b = [True]
+
+        def from_application(app_name):
+            if app_name == "B" and fail_b[0]:
+                # like ArcherInstance on a transient error: fields of A are left in place
+                self.arch.current_app_name = None
+                return self.arch
+            return load(app_name)
+        self.arch.from_application.side_effect = from_application
+
+        self.assertEqual(self.rs._resolve_lookup_context("A", "Ticket"), (10, 100))
+        with self.assertRaises(ValueError):
+            self.rs._resolve_lookup_context("B", "Ticket")
+        fail_b[0] = False
+        self.assertEqual(self.rs._resolve_lookup_context("B", "Ticket"), (20, 200))
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    @patch("rsa_archer.record_search.requests.Session.get")
     def test_contentapi_fallback(self, mock_get, mock_post):
-        # Simulate REST probe returning 404 (unsupported)
-        probe_resp = MockResponse(status_code=404, json_data={})
-        mock_post.side_effect = [probe_resp]
+        # Simulate REST search returning 404 (unsupported)
+        mock_post.return_value = MockResponse(status_code=404, json_data={})
 
         # Setup application fields
         self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
@@ -119,6 +199,403 @@ class TestRecordSearcher(unittest.TestCase):
 
         rid = self.rs.get_record_id_by_field("App", "Ticket Number", "XYZ")
         self.assertEqual(rid, 222)
+        params = mock_get.call_args.kwargs["params"]
+        self.assertEqual(params, {"$filter": "Ticket Number eq 'XYZ'", "$select": "Endpoint_Id,Ticket Number"})
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_rest_response_shapes(self, mock_post):
+        mock_post.side_effect = [
+            MockResponse(status_code=200, json_data={"value": [{"App_Id": 5}, {"App_Id": 6}]}),
+            MockResponse(status_code=200, json_data={"value": [{"App_Id": 7}]}),
+            # shape changed: detected again from the first item
+            MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 8}}]),
+            MockResponse(status_code=200, json_data={"RequestedObject": {"Id": 9}}),
+        ]
+
+        self.assertEqual(self.rs._rest_search_record_ids(100, 10, "A"), [5, 6])
+        self.assertEqual(self.rs._rest_search_record_ids(100, 10, "B"), [7])
+        self.assertEqual(self.rs._rest_search_record_ids(100, 10, "C"), [8])
+        self.assertEqual(self.rs._rest_search_record_ids(100, 10, "D"), [9])
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_rest_single_search_body(self, mock_post):
+        mock_post.return_value = MockResponse(status_code=200, json_data=[])
+        self.rs._rest_search_record_ids(100, 10, 'say "hi"')
+        self.assertEqual(posted_body(mock_post.call_args), {
+            "ModuleId": 100,
+            "Page": {"Start": 0, "Size": 2},
+            "Filters": [{"FieldId": 10, "Operator": "Equals", "Value": 'say "hi"'}],
+            "ReturnFields": ["Id"],
+        })
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_rest_unsupported_cached_per_module(self, mock_get, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+        mock_post.side_effect = [
+            MockResponse(status_code=405, json_data={}),
+            MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 3}}]),
+        ]
+        mock_get.side_effect = [
+            MockResponse(status_code=200, json_data={"value": [{"name": "App", "url": "Endpoint"}]}),
+            MockResponse(status_code=200, json_data={"value": [{"Endpoint_Id": 1}]}),
+            MockResponse(status_code=200, json_data={"value": [{"Endpoint_Id": 2}]}),
+        ]
+
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "A"), 1)
+        # REST is not tried again for the module
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "B"), 2)
+        self.assertEqual(mock_post.call_count, 1)
+
+        self.rs.invalidate_cache()
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "C"), 3)
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_rest_server_error_fails_over_to_contentapi(self, mock_get, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+        mock_post.return_value = MockResponse(status_code=503, json_data={})  # search fails
+
+        def fake_get(url, **kwargs):
+            if url == self.arch.content_api_url_base:
+                return MockResponse(status_code=200, json_data={"value": [{"name": "App", "url": "Endpoint"}]})
+            value = kwargs["params"]["$filter"].split("'")[1]
+            return MockResponse(status_code=200, json_data={"value": [{"Endpoint_Id": int(value)}]})
+        mock_get.side_effect = fake_get
+
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "1"), 1)
+        self.assertEqual(mock_post.call_count, 1)
+
+        # REST keeps being tried until the circuit breaker opens after five failures in a row
+        for i in range(2, 6):
+            self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", str(i)), i)
+        self.assertEqual(mock_post.call_count, 5)
+
+        # REST is skipped during the cool-down window
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "6"), 6)
+        self.assertEqual(mock_post.call_count, 5)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_found_lookups_cached(self, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+        mock_post.side_effect = [
+            MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 555}}]),
+            MockResponse(status_code=200, json_data=[]),
+            MockResponse(status_code=200, json_data=[]),
+            MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 556}}]),
+        ]
+
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "A"), 555)
+        self.assertEqual(self.rs.get_record_id_by_field("App", "ticket number", "A"), 555)
+        self.assertEqual(mock_post.call_count, 1)
+
+        # misses are not cached
+        self.assertIsNone(self.rs.get_record_id_by_field("App", "Ticket Number", "B"))
+        self.assertIsNone(self.rs.get_record_id_by_field("App", "Ticket Number", "B"))
+        self.assertEqual(mock_post.call_count, 3)
+
+        self.rs.invalidate("App")
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "A"), 556)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_single_in_request(self, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+        # One collapsed search response, grouped by the returned field value
+        search_resp = MockResponse(status_code=200, json_data=[
+            {"RequestedObject": {"Id": 101, "Ticket Number": "INC-1"}},
+            {"RequestedObject": {"Id": 103, "Ticket Number": "INC-3"}},
+        ])
+        mock_post.return_value = search_resp
+
+        results = self.rs.get_record_ids_by_field_bulk("App", "Ticket Number", ["INC-1", "INC-2", "INC-3"])
+        self.assertEqual(results, {"INC-1": 101, "INC-2": None, "INC-3": 103})
+        self.assertEqual(mock_post.call_count, 1)
+        body = posted_body(mock_post.call_args)
+        self.assertEqual(body["Filters"][0]["Operator"], "In")
+        self.assertEqual(body["Filters"][0]["Values"], ["INC-1", "INC-2", "INC-3"])
+        self.assertEqual(body["ReturnFields"], ["Id", "10"])
+
+        # found values are served from the lookup cache
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "INC-3"), 103)
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_values_list_resolved_in_one_call(self, mock_post):
+        self.arch.application_fields_json = {"Status": 20, 20: {"Type": 4, "FieldId": 20}}
+        self.arch.get_value_ids_by_field_name_and_values = Mock(return_value={"Open": [999], "Closed": [998]})
+        mock_post.return_value = MockResponse(status_code=200, json_data=[
+            {"RequestedObject": {"Id": 71, "FieldContents": {"20": {"Value": {"ValuesListIds": [999]}}}}},
+            {"RequestedObject": {"Id": 72, "FieldContents": {"20": {"Value": {"ValuesListIds": [998]}}}}},
+        ])
+
+        results = self.rs.get_record_ids_by_field_bulk("App", "Status", ["Open", "Closed", "Unknown"])
+        self.assertEqual(results, {"Open": 71, "Closed": 72, "Unknown": None})
+        self.arch.get_value_ids_by_field_name_and_values.assert_called_once_with(
+            "Status", ["Open", "Closed", "Unknown"]
+        )
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(posted_body(mock_post.call_args)["Filters"][0]["Values"], [999, 998])
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_values_list_ids_cached_per_app(self, mock_post):
+        self.use_apps({
+            "A": ({"Status": 20, 20: {"Type": 4, "FieldId": 20}}, "1", 901),
+            "B": ({"Status": 30, 30: {"Type": 4, "FieldId": 30}}, "2", 902),
+        })
+        self.arch.get_value_ids_by_field_name_and_values = Mock(
+            side_effect=lambda field_name, values: {"Open": [self.arch.open_value_id]}
+        )
+        mock_post.return_value = MockResponse(status_code=200, json_data=[])
+
+        self.rs.get_record_ids_by_field_bulk("A", "Status", ["Open"])
+        self.rs.get_record_ids_by_field_bulk("B", "Status", ["Open"])
+        body = posted_body(mock_post.call_args)
+        self.assertEqual(body["ModuleId"], 2)
+        self.assertEqual(body["Filters"][0]["Values"], [902])
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_async(self, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+        mock_post.return_value = MockResponse(
+            status_code=200, json_data=[{"RequestedObject": {"Id": 101, "Ticket Number": "INC-1"}}]
+        )
+
+        results = asyncio.run(self.rs.get_record_ids_by_field_bulk_async("App", "Ticket Number", ["INC-1", "INC-2"]))
+        self.assertEqual(results, {"INC-1": 101, "INC-2": None})
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_in_request_ambiguous(self, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+        search_resp = MockResponse(status_code=200, json_data=[
+            {"RequestedObject": {"Id": 1, "Ticket Number": "DUP"}},
+            {"RequestedObject": {"Id": 2, "Ticket Number": "dup"}},
+            {"RequestedObject": {"Id": 3, "Ticket Number": "ONE"}},
+        ])
+        mock_post.return_value = search_resp
+
+        with self.assertRaises(AmbiguousMatch) as cm:
+            self.rs.get_record_ids_by_field_bulk("App", "Ticket Number", ["DUP", "ONE"])
+        self.assertEqual(cm.exception.details, {"DUP": [1, 2]})
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_in_rejected_falls_back_per_value(self, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+
+        # Per-value requests run concurrently, so answer by request body rather than call order
+        def fake_post(url, data=None, **kwargs):
+            flt = json.loads(data)["Filters"][0]
+            if flt["Operator"] == "In":
+                return MockResponse(status_code=400, json_data={})  # "In" operator rejected
+            if flt["Value"] == "INC-1":
+                return MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 101}}])
+            return MockResponse(status_code=200, json_data=[])
+        mock_post.side_effect = fake_post
+
+        results = self.rs.get_record_ids_by_field_bulk("App", "Ticket Number", ["INC-1", "INC-2"])
+        self.assertEqual(results, {"INC-1": 101, "INC-2": None})
+        # one rejected "In" search, then one search per value
+        self.assertEqual(mock_post.call_count, 3)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_in_result_without_field_falls_back_per_value(self, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+
+        def fake_post(url, data=None, **kwargs):
+            flt = json.loads(data)["Filters"][0]
+            if flt["Operator"] == "In":
+                # records matched but the field value was not returned, so they cannot be grouped
+                return MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 101}}])
+            if flt["Value"] == "INC-1":
+                return MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 101}}])
+            return MockResponse(status_code=200, json_data=[])
+        mock_post.side_effect = fake_post
+
+        results = self.rs.get_record_ids_by_field_bulk("App", "Ticket Number", ["INC-1", "INC-2"])
+        self.assertEqual(results, {"INC-1": 101, "INC-2": None})
+        self.assertEqual(mock_post.call_count, 3)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_in_full_page_falls_back_per_value(self, mock_post):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+
+        def fake_post(url, data=None, **kwargs):
+            body = json.loads(data)
+            flt = body["Filters"][0]
+            if flt["Operator"] == "In":
+                # "A" matches many records, filling the page before "B"'s record
+                size = body["Page"]["Size"]
+                return MockResponse(status_code=200, json_data=[
+                    {"RequestedObject": {"Id": i, "Ticket Number": "A"}} for i in range(1, size + 1)
+                ])
+            if flt["Value"] == "B":
+                return MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 50}}])
+            return MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 1}}])
+        mock_post.side_effect = fake_post
+
+        results = self.rs.get_record_ids_by_field_bulk("App", "Ticket Number", ["A", "B"])
+        self.assertEqual(results, {"A": 1, "B": 50})
+        self.assertEqual(mock_post.call_count, 3)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    def test_bulk_in_result_in_other_value_form_falls_back_per_value(self, mock_post):
+        self.arch.application_fields_json = {"Amount": 10, 10: {"Type": 2, "FieldId": 10}}
+
+        def fake_post(url, data=None, **kwargs):
+            flt = json.loads(data)["Filters"][0]
+            if flt["Operator"] == "In":
+                # numeric field echoed back as 5.0, not as the searched "5"
+                return MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 101, "Amount": 5.0}}])
+            return MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 101}}])
+        mock_post.side_effect = fake_post
+
+        results = self.rs.get_record_ids_by_field_bulk("App", "Amount", ["5"])
+        self.assertEqual(results, {"5": 101})
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_bulk_contentapi_or_filter(self, mock_get, mock_post):
+        mock_post.return_value = MockResponse(status_code=404, json_data={})
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+        mock_get.side_effect = [
+            MockResponse(status_code=200, json_data={"value": [{"name": "App", "url": "Endpoint"}]}),
+            MockResponse(status_code=200, json_data={"value": [
+                {"Endpoint_Id": 11, "Ticket Number": "INC-1"},
+                {"Endpoint_Id": 1, "Ticket Number": "DUP"},
+                {"Endpoint_Id": 2, "Ticket Number": "DUP"},
+            ]}),
+        ]
+
+        with self.assertRaises(AmbiguousMatch) as cm:
+            self.rs.get_record_ids_by_field_bulk("App", "Ticket Number", ["INC-1", "DUP", "NONE"])
+        self.assertEqual(cm.exception.details, {"DUP": [1, 2]})
+        # endpoint discovered once, then a single OR-joined search
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(
+            mock_get.call_args.kwargs["params"]["$filter"],
+            "Ticket Number eq 'INC-1' or Ticket Number eq 'DUP' or Ticket Number eq 'NONE'",
+        )
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_bulk_contentapi_result_without_field_falls_back_per_value(self, mock_get, mock_post):
+        mock_post.return_value = MockResponse(status_code=404, json_data={})
+        self.arch.application_fields_json = {"Amount": 10, 10: {"Type": 2, "FieldId": 10}}
+
+        def fake_get(url, **kwargs):
+            if url == self.arch.content_api_url_base:
+                return MockResponse(status_code=200, json_data={"value": [{"name": "App", "url": "E"}]})
+            # the server ignores the field in $select
+            return MockResponse(status_code=200, json_data={"value": [{"E_Id": 11}]})
+        mock_get.side_effect = fake_get
+
+        results = self.rs.get_record_ids_by_field_bulk("App", "Amount", ["5"])
+        self.assertEqual(results, {"5": 11})
+        # endpoint discovery, the OR-joined search, then the per-value search
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_contentapi_or_filter_chunked(self, mock_get):
+        mock_get.return_value = MockResponse(status_code=200, json_data={"value": []})
+        values = [f"INC-{i}" for i in range(120)]
+
+        grouped = self.rs._contentapi_search_record_ids_multi("Endpoint", "Ticket Number", values)
+        self.assertEqual(grouped, {})
+        self.assertEqual(mock_get.call_count, 3)
+        for call in mock_get.call_args_list:
+            self.assertLessEqual(call.kwargs["params"]["$filter"].count(" or "), 49)
+
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_contentapi_or_filter_chunked_by_encoded_length(self, mock_get):
+        mock_get.return_value = MockResponse(status_code=200, json_data={"value": []})
+        # non-ASCII values grow several times when percent-encoded
+        values = [f"Заявка-{i}" for i in range(40)]
+
+        self.rs._contentapi_search_record_ids_multi("Endpoint", "Ticket Number", values)
+        self.assertGreater(mock_get.call_count, 1)
+        for call in mock_get.call_args_list:
+            encoded = urllib.parse.urlencode({"$filter": call.kwargs["params"]["$filter"]})
+            self.assertLessEqual(len(encoded) - len("%24filter="), record_search._ODATA_FILTER_MAX_LEN)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_bulk_contentapi_per_value_fallback(self, mock_get, mock_post):
+        mock_post.return_value = MockResponse(status_code=404, json_data={})
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+
+        def fake_get(url, **kwargs):
+            if url == self.arch.content_api_url_base:
+                return MockResponse(status_code=200, json_data={"value": [{"name": "App", "url": "Endpoint"}]})
+            flt = kwargs["params"]["$filter"]
+            if " or " in flt:
+                return MockResponse(status_code=400, json_data={})  # OR filter rejected
+            if "INC-1" in flt:
+                return MockResponse(status_code=200, json_data={"value": [{"Endpoint_Id": 11}]})
+            return MockResponse(status_code=200, json_data={"value": []})
+        mock_get.side_effect = fake_get
+
+        results = self.rs.get_record_ids_by_field_bulk("App", "Ticket Number", ["INC-1", "NONE"])
+        self.assertEqual(results, {"INC-1": 11, "NONE": None})
+        # endpoint discovery, rejected OR search, then one search per value
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch("rsa_archer.record_search.requests.Session.post")
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_metadata_and_endpoint_cached(self, mock_get, mock_post):
+        mock_post.return_value = MockResponse(status_code=404, json_data={})
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+        self.arch.from_application = Mock(return_value=self.arch)
+        mock_get.side_effect = [
+            MockResponse(status_code=200, json_data={"value": [{"name": "App", "url": "Endpoint"}]}),
+            MockResponse(status_code=200, json_data={"value": [{"Endpoint_Id": 1}]}),
+            MockResponse(status_code=200, json_data={"value": [{"Endpoint_Id": 2}]}),
+        ]
+
+        self.assertEqual(self.rs.get_record_id_by_field("App", "Ticket Number", "A"), 1)
+        self.assertEqual(self.rs.get_record_id_by_field("App", "ticket number", "B"), 2)
+        # endpoint discovery and application metadata load happen once
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(self.arch.from_application.call_count, 1)
+
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_endpoint_discovery_error_not_cached(self, mock_get):
+        mock_get.side_effect = [
+            MockResponse(status_code=401, json_data={"Message": "Session expired"}),
+            MockResponse(status_code=200, json_data={"value": [{"name": "App", "url": "Endpoint"}]}),
+        ]
+
+        self.assertIsNone(self.rs._get_grc_endpoint_url("App"))
+        self.assertEqual(self.rs._get_grc_endpoint_url("App"), "Endpoint")
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_reuses_archer_session(self):
+        session = Mock()
+        session.post.return_value = MockResponse(status_code=200, json_data=[{"RequestedObject": {"Id": 555}}])
+        self.arch.session = session
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1, "FieldId": 10}}
+
+        rs = RecordSearcher(self.arch)
+        self.assertEqual(rs.get_record_id_by_field("App", "Ticket Number", "SOME-VALUE"), 555)
+        self.assertEqual(session.post.call_count, 1)
+
+    @patch("rsa_archer.record_search.ijson")
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_contentapi_large_response_streamed(self, mock_get, mock_ijson):
+        mock_get.return_value = MockResponse(status_code=200, headers={"Content-Length": str(1024 * 1024)})
+        mock_ijson.items.return_value = iter([{"Endpoint_Id": 7}])
+
+        ids = self.rs._contentapi_search_record_ids("Endpoint", "Ticket Number", "XYZ")
+        self.assertEqual(ids, [7])
+        mock_ijson.items.assert_called_once_with(mock_get.return_value.raw, "value.item")
+        self.assertTrue(mock_get.call_args.kwargs["stream"])
+
+    @patch("rsa_archer.record_search.requests.Session.get")
+    def test_contentapi_filter_escapes_quotes(self, mock_get):
+        mock_get.return_value = MockResponse(status_code=200, json_data={"value": []})
+        self.rs._contentapi_search_record_ids("Endpoint", "Name", "O'Brien")
+        self.assertEqual(mock_get.call_args.kwargs["params"]["$filter"], "Name eq 'O''Brien'")
+        self.assertEqual(escape_odata("it's 'quoted'"), "it''s ''quoted''")
 
     def test_resolve_field_case_insensitive(self):
         # Ensure DisplayName matching is case-insensitive
@@ -126,6 +603,75 @@ class TestRecordSearcher(unittest.TestCase):
         fid = self.rs._resolve_field_id_by_display_name("App", "ticket number")
         self.assertEqual(fid, 10)
 
+    def test_resolve_field_index_built_once_per_app(self):
+        self.arch.application_fields_json = {"Ticket Number": 10, "Status": 20, 10: {"Type": 1}, 20: {"Type": 4}}
+        self.arch.from_application = Mock(return_value=self.arch)
+
+        self.assertEqual(self.rs._resolve_field_id_by_display_name("App", "Ticket Number"), 10)
+        self.assertEqual(self.rs._resolve_field_id_by_display_name("App", "STATUS"), 20)
+        with self.assertRaises(ValueError):
+            self.rs._resolve_field_id_by_display_name("App", "Missing")
+        self.assertEqual(self.arch.from_application.call_count, 1)
+
+    def test_resolve_field_skips_loading_current_app(self):
+        self.arch.application_fields_json = {"Ticket Number": 10, 10: {"Type": 1}}
+        self.arch.current_app_name = "App"
+        self.arch.from_application = Mock(return_value=self.arch)
+
+        self.assertEqual(self.rs._resolve_field_id_by_display_name("App", "Ticket Number"), 10)
+        self.rs.invalidate_cache()
+        self.assertEqual(self.rs._resolve_field_id_by_display_name("App", "Ticket Number"), 10)
+        self.arch.from_application.assert_not_called()
+
+    @patch("rsa_archer.archer_instance.requests.post")
+    @patch("rsa_archer.archer_instance.requests.get")
+    def test_failed_field_load_retried(self, mock_get, mock_post):
+        mock_post.side_effect = requests.ConnectionError("no server")
+
+        def fake_get(url, **kwargs):
+            if url.endswith("core/system/application/"):
+                return MockResponse(status_code=200, json_data=[{"RequestedObject": {"Name": "App", "Id": 5}}])
+            raise requests.ConnectionError("field definitions unavailable")
+        mock_get.side_effect = fake_get
+
+        arch = ArcherInstance("fake", "Inst", "user", "pass")
+        rs = RecordSearcher(arch, session=Mock())
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                rs._resolve_field_id_by_display_name("App", "Ticket Number")
+        self.assertIsNone(arch.current_app_name)
+        applications_loaded = [c for c in mock_get.call_args_list if c.args[0].endswith("core/system/application/")]
+        self.assertEqual(len(applications_loaded), 3)
+
+    def test_group_ids_by_value(self):
+        items = [
+            {"Ticket_Id": 1, "Ticket Number": "ABC"},
+            {"Ticket_Id": "2", "Ticket Number": "abc"},
+            {"Ticket_Id": 1, "Ticket Number": "ABC"},
+            {"Ticket_Id": 3, "Ticket Number": ["X", None, "Y"]},
+            {"Ticket_Id": 0, "Ticket Number": "Z"},
+            {"Ticket Number": "Z"},
+            "not an item",
+        ]
+        expected = {"abc": [1, 2], "x": [3], "y": [3]}
+        self.assertEqual(record_search._group_ids_by_value_py(items, "Ticket Number", "Ticket_Id"), expected)
+        # the compiled version, when built, must agree with the pure-Python one
+        self.assertEqual(record_search._group_ids_by_value(items, "Ticket Number", "Ticket_Id"), expected)
+
+        grouped = {"abc": [2]}
+        record_search._group_ids_by_value(items[:1], "Ticket Number", "Ticket_Id", grouped)
+        self.assertEqual(grouped, {"abc": [2, 1]})
+
+        # ids beyond the limit per value are not collected
+        many = [{"Ticket_Id": i, "Ticket Number": "DUP"} for i in range(1, 6)]
+        for group in (record_search._group_ids_by_value_py, record_search._group_ids_by_value):
+            self.assertEqual(group(many, "Ticket Number", "Ticket_Id"), {"dup": [1, 2]})
+
+        # an item with a record id but no field value cannot be grouped
+        for group in (record_search._group_ids_by_value_py, record_search._group_ids_by_value):
+            self.assertIsNone(group([{"Ticket_Id": 4}], "Ticket Number", "Ticket_Id"))
+            self.assertIsNone(group([{"Ticket_Id": 4, "Ticket Number": [None]}], "Ticket Number", "Ticket_Id"))
+
 
 if __name__ == "__main__":
     unittest.main()
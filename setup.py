@@ -1,4 +1,4 @@
-from setuptools import setup,find_packages
+from setuptools import setup,find_packages,Extension
 
 def readme():
     with open('README.md') as f:
@@ -8,6 +8,17 @@ requires = [
     'requests'
 ]
 
+try:
+    # optional compiled grouping of bulk lookup results; record_search falls back to pure Python without it
+    from Cython.Build import cythonize
+    ext_modules = cythonize([Extension('rsa_archer._fast', ['rsa_archer/_fast.pyx'])])
+    # let the install go on without the extension when it fails to compile (e.g. no C compiler);
+    # set after cythonize, which does not carry the flag over to the extensions it returns
+    for ext in ext_modules:
+        ext.optional = True
+except ImportError:
+    ext_modules = []
+
 setup(
 		name='rsa_archer',
 		version='0.1.9',
@@ -28,4 +39,9 @@ setup(
     	'Topic :: Software Development :: Libraries'
     	],
 		install_requires=requires,
+		ext_modules=ext_modules,
+		extras_require={
+			'stream': ['ijson'],
+			'speedups': ['orjson'],
+		},
 )